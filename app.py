@@ -1,21 +1,24 @@
 import streamlit as st
 import os
 import tempfile
-from docx2pdf import convert
+import codecs
 from pathlib import Path
-import base64
 import logging
-from typing import Optional, Tuple
+import re
+from typing import Iterator, List, Tuple
 import time
 import hashlib
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import markdown
-from weasyprint import HTML, CSS
-from pptx import Presentation
-from io import BytesIO
+import threading
+import importlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import CancelledError, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+try:
+    import blake3
+except ImportError:  # Fall back to SHA-256 when blake3 is not installed
+    blake3 = None
+import converters
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +28,21 @@ logger = logging.getLogger(__name__)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_EXTENSIONS = ['docx', 'pptx', 'txt', 'md']
 TEMP_FILE_CLEANUP_DELAY = 300  # 5 minutes
+TEMP_FILE_SCAN_INTERVAL = 60  # 1 minute
+# Partial PDFs are created when a batch starts and may still be written long after
+PARTIAL_FILE_CLEANUP_DELAY = 24 * 60 * 60  # 1 day
+PARTIAL_FILE_SUFFIX = ".partial.pdf"
+HASH_CHUNK_SIZE = 64 * 1024  # 64KB
+UTF8_CHECK_WINDOW = 64 * 1024  # 64KB
+UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+CACHE_DIR = Path(tempfile.gettempdir()) / "pdf_converter_cache"
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\-. ]+')
+CONVERSION_TIMEOUT = 120  # seconds per document
+CONVERSION_POLL_INTERVAL = 1  # second
+CONVERSION_WORKERS = os.cpu_count() or 1
+CONVERSION_HISTORY_SIZE = 10
+LIBREOFFICE_CHECK_INTERVAL = 30  # seconds, doubled after each restart
+LIBREOFFICE_MAX_CHECK_INTERVAL = 600  # 10 minutes
 
 # File type configurations
 FILE_TYPE_CONFIG = {
@@ -32,7 +50,7 @@ FILE_TYPE_CONFIG = {
         'name': 'Word Document',
         'icon': '📄',
         'description': 'Microsoft Word documents (.docx)',
-        'requires': 'Microsoft Word'
+        'requires': 'LibreOffice or Microsoft Word'
     },
     'pptx': {
         'name': 'PowerPoint Presentation',
@@ -50,46 +68,69 @@ FILE_TYPE_CONFIG = {
         'name': 'Markdown File',
         'icon': '📋',
         'description': 'Markdown files (.md)',
-        'requires': 'Markdown and WeasyPrint libraries'
+        'requires': 'markdown-it-py and WeasyPrint libraries'
     }
 }
 
-def validate_file(uploaded_file) -> Tuple[bool, str]:
+def verify_utf8(file_content: bytes) -> None:
+    """
+    Check that file content is UTF-8 without decoding large files in full
+    
+    Files larger than two check windows only have their first and last
+    64KB decoded; smaller files are decoded completely.
+    
+    Args:
+        file_content (bytes): Raw bytes of the uploaded file
+    
+    Raises:
+        UnicodeDecodeError: If a checked region is not valid UTF-8
+    """
+    if len(file_content) <= 2 * UTF8_CHECK_WINDOW:
+        file_content.decode('utf-8')
+        return
+    
+    # Window edges may split a multi-byte character: allow an incomplete
+    # sequence at the end of the head and skip continuation bytes at the
+    # start of the tail
+    codecs.getincrementaldecoder('utf-8')().decode(file_content[:UTF8_CHECK_WINDOW], final=False)
+    file_content[-UTF8_CHECK_WINDOW:].lstrip(UTF8_CONTINUATION_BYTES).decode('utf-8')
+
+def validate_file(file_content: bytes, file_name: str, file_size: int) -> Tuple[bool, str]:
     """
     Validate uploaded file for security and format requirements
     
     Args:
-        uploaded_file: Streamlit uploaded file object
+        file_content (bytes): Raw bytes of the uploaded file
+        file_name (str): Original name of the uploaded file
+        file_size (int): Size of the uploaded file in bytes
     
     Returns:
         Tuple[bool, str]: (is_valid, error_message)
     """
-    if not uploaded_file:
+    if not file_name:
         return False, "No file uploaded"
     
     # Check file size
-    if uploaded_file.size > MAX_FILE_SIZE:
+    if file_size > MAX_FILE_SIZE:
         return False, f"File too large. Maximum size allowed: {MAX_FILE_SIZE // (1024*1024)}MB"
     
-    if uploaded_file.size == 0:
+    if file_size == 0:
         return False, "File is empty"
     
     # Check file extension
-    file_extension = Path(uploaded_file.name).suffix.lower().lstrip('.')
+    file_extension = Path(file_name).suffix.lower().lstrip('.')
     if file_extension not in ALLOWED_EXTENSIONS:
         return False, f"Unsupported file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
     
     # Basic file content validation
     try:
-        file_content = uploaded_file.getvalue()
-        
         # Validate based on file type
         if file_extension in ['docx', 'pptx']:
             if not file_content.startswith(b'PK'):  # Office files start with PK (ZIP signature)
                 return False, f"Invalid {file_extension.upper()} file format"
         elif file_extension == 'txt':
             try:
-                file_content.decode('utf-8')
+                verify_utf8(file_content)
             except UnicodeDecodeError:
                 try:
                     file_content.decode('latin-1')
@@ -97,7 +138,7 @@ def validate_file(uploaded_file) -> Tuple[bool, str]:
                     return False, "Text file contains invalid characters"
         elif file_extension == 'md':
             try:
-                file_content.decode('utf-8')
+                verify_utf8(file_content)
             except UnicodeDecodeError:
                 return False, "Markdown file must be UTF-8 encoded"
                 
@@ -106,325 +147,296 @@ def validate_file(uploaded_file) -> Tuple[bool, str]:
     
     return True, ""
 
-def convert_word_to_pdf(input_path: str, output_path: str) -> Tuple[bool, str]:
+def compute_file_hash(file_content: bytes) -> str:
     """
-    Convert a Word document to PDF with better error handling
+    Compute a content hash used as the PDF cache key
+    
+    Uses BLAKE3 when available and falls back to SHA-256 otherwise.
     
     Args:
-        input_path (str): Path to the input .docx file
-        output_path (str): Path for the output .pdf file
+        file_content (bytes): Raw bytes of the uploaded file
     
     Returns:
-        Tuple[bool, str]: (success, error_message)
+        str: Hex digest of the file content
     """
-    try:
-        # Validate input file exists
-        if not os.path.exists(input_path):
-            return False, "Input file not found"
-        
-        # Perform conversion
-        convert(input_path, output_path)
-        
-        # Verify output file was created
-        if not os.path.exists(output_path):
-            return False, "PDF file was not created"
-        
-        # Check if output file has content
-        if os.path.getsize(output_path) == 0:
-            return False, "Generated PDF file is empty"
-        
-        logger.info(f"Successfully converted {input_path} to {output_path}")
-        return True, ""
-        
-    except Exception as e:
-        error_msg = f"Word conversion failed: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+    hasher = blake3.blake3() if blake3 is not None else hashlib.sha256()
+    view = memoryview(file_content)
+    for offset in range(0, len(view), HASH_CHUNK_SIZE):
+        hasher.update(view[offset:offset + HASH_CHUNK_SIZE])
+    
+    if blake3 is not None:
+        return hasher.hexdigest(length=16)
+    return hasher.hexdigest()
 
-def convert_powerpoint_to_pdf(input_path: str, output_path: str) -> Tuple[bool, str]:
+@st.cache_resource
+def get_conversion_pool() -> ProcessPoolExecutor:
     """
-    Convert a PowerPoint presentation to PDF
+    Create the conversion worker pool shared by all sessions
     
-    Args:
-        input_path (str): Path to the input .pptx file
-        output_path (str): Path for the output .pdf file
+    Workers are started fresh rather than forked from the multi-threaded
+    server, and import the converters module on startup so its styles,
+    fonts and Markdown parser are built before the first job arrives.
     
     Returns:
-        Tuple[bool, str]: (success, error_message)
+        ProcessPoolExecutor: Shared process pool
     """
-    try:
-        # Load presentation
-        prs = Presentation(input_path)
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title style
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            textColor='darkblue'
-        )
-        
-        # Content style
-        content_style = ParagraphStyle(
-            'CustomContent',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=12
-        )
-        
-        # Process each slide
-        for i, slide in enumerate(prs.slides):
-            # Add slide number
-            story.append(Paragraph(f"Slide {i + 1}", title_style))
-            story.append(Spacer(1, 12))
-            
-            # Extract text from shapes
-            slide_text = []
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    slide_text.append(shape.text.strip())
-            
-            if slide_text:
-                for text in slide_text:
-                    # Clean and format text
-                    clean_text = text.replace('\n', '<br/>')
-                    story.append(Paragraph(clean_text, content_style))
-                    story.append(Spacer(1, 6))
-            else:
-                story.append(Paragraph("(No text content)", content_style))
-            
-            # Add space between slides
-            story.append(Spacer(1, 20))
-        
-        # Build PDF
-        doc.build(story)
-        
-        logger.info(f"Successfully converted PowerPoint {input_path} to {output_path}")
-        return True, ""
-        
-    except Exception as e:
-        error_msg = f"PowerPoint conversion failed: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=CONVERSION_WORKERS,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=importlib.import_module,
+        initargs=(converters.__name__,)
+    )
 
-def convert_text_to_pdf(input_path: str, output_path: str) -> Tuple[bool, str]:
+def recycle_conversion_pool(pool: ProcessPoolExecutor):
     """
-    Convert a text file to PDF
+    Replace a broken or stuck worker pool with a fresh one
     
-    Args:
-        input_path (str): Path to the input .txt file
-        output_path (str): Path for the output .pdf file
+    Queued jobs are cancelled and the workers are terminated, so a hung
+    conversion doesn't keep its process alive next to the new pool.
     
-    Returns:
-        Tuple[bool, str]: (success, error_message)
+    Args:
+        pool (ProcessPoolExecutor): Pool to retire
     """
-    try:
-        # Read text file
-        with open(input_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Custom style for text
-        text_style = ParagraphStyle(
-            'CustomText',
-            parent=styles['Normal'],
-            fontSize=11,
-            fontName='Courier',
-            spaceAfter=6,
-            leftIndent=0
-        )
-        
-        # Split content into paragraphs
-        paragraphs = content.split('\n\n')
-        
-        for paragraph in paragraphs:
-            if paragraph.strip():
-                # Replace line breaks with HTML breaks
-                formatted_text = paragraph.replace('\n', '<br/>')
-                # Escape HTML characters
-                formatted_text = formatted_text.replace('&', '&amp;').replace('<br/>', '<br/>')
-                story.append(Paragraph(formatted_text, text_style))
-                story.append(Spacer(1, 6))
-        
-        # Build PDF
-        doc.build(story)
-        
-        logger.info(f"Successfully converted text file {input_path} to {output_path}")
-        return True, ""
-        
-    except Exception as e:
-        error_msg = f"Text conversion failed: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+    if get_conversion_pool() is pool:
+        get_conversion_pool.clear()
+    
+    # shutdown() drops the pool's process table, so take it first
+    workers = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for worker in workers:
+        worker.terminate()
 
-def convert_markdown_to_pdf(input_path: str, output_path: str) -> Tuple[bool, str]:
+def iter_conversions(jobs: List[Tuple[bytes, str, str]]) -> Iterator[Tuple[int, bool, str]]:
     """
-    Convert a Markdown file to PDF
+    Run document conversions in the shared worker pool
+    
+    Word documents are sent as a single batch job so Word starts once for
+    all of them; every other document gets its own job. Results are
+    yielded as soon as each job finishes.
+    
+    Each job may run for CONVERSION_TIMEOUT seconds per document, counted
+    from when the pool hands it to a worker. A job that overruns has its
+    pool retired, and the rest of the batch is resubmitted to a new pool.
     
     Args:
-        input_path (str): Path to the input .md file
-        output_path (str): Path for the output .pdf file
+        jobs: (input_data, output_path, file_type) for each document
     
-    Returns:
-        Tuple[bool, str]: (success, error_message)
+    Yields:
+        Tuple[int, bool, str]: (job_index, success, error_message)
     """
-    try:
-        # Read markdown file
-        with open(input_path, 'r', encoding='utf-8') as file:
-            md_content = file.read()
-        
-        # Convert markdown to HTML
-        html_content = markdown.markdown(
-            md_content,
-            extensions=['extra', 'codehilite', 'toc']
+    # Pool tasks keyed by their first job index: (function, args, job_indices)
+    tasks = {}
+    word_indices = [i for i, (_, _, file_type) in enumerate(jobs) if file_type == 'docx']
+    if word_indices:
+        tasks[word_indices[0]] = (
+            converters.convert_word_batch_to_pdf,
+            ([(jobs[i][0], jobs[i][1]) for i in word_indices],),
+            word_indices
         )
-        
-        # Create complete HTML document
-        full_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    margin: 40px;
-                    color: #333;
-                }}
-                h1, h2, h3, h4, h5, h6 {{
-                    color: #2c3e50;
-                    margin-top: 30px;
-                    margin-bottom: 15px;
-                }}
-                h1 {{ font-size: 2.2em; }}
-                h2 {{ font-size: 1.8em; }}
-                h3 {{ font-size: 1.4em; }}
-                p {{ margin-bottom: 15px; }}
-                code {{
-                    background-color: #f4f4f4;
-                    padding: 2px 4px;
-                    border-radius: 3px;
-                    font-family: 'Courier New', monospace;
-                }}
-                pre {{
-                    background-color: #f8f8f8;
-                    padding: 15px;
-                    border-radius: 5px;
-                    overflow-x: auto;
-                    border-left: 4px solid #3498db;
-                }}
-                blockquote {{
-                    border-left: 4px solid #bdc3c7;
-                    margin-left: 0;
-                    padding-left: 20px;
-                    color: #7f8c8d;
-                }}
-                table {{
-                    border-collapse: collapse;
-                    width: 100%;
-                    margin: 20px 0;
-                }}
-                th, td {{
-                    border: 1px solid #ddd;
-                    padding: 8px;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f2f2f2;
-                    font-weight: bold;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # Convert HTML to PDF using WeasyPrint
-        HTML(string=full_html).write_pdf(output_path)
-        
-        logger.info(f"Successfully converted Markdown {input_path} to {output_path}")
-        return True, ""
-        
-    except Exception as e:
-        error_msg = f"Markdown conversion failed: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+    for i, (input_data, output_path, file_type) in enumerate(jobs):
+        if file_type != 'docx':
+            tasks[i] = (converters.convert_document_to_pdf, (input_data, output_path, file_type), [i])
+    
+    while tasks:
+        pool = get_conversion_pool()
+        try:
+            futures = {pool.submit(function, *args): key for key, (function, args, _) in tasks.items()}
+            started = {}
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=CONVERSION_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    key = futures[future]
+                    function, _, indices = tasks[key]
+                    try:
+                        outcome = future.result()
+                        results = outcome if function is converters.convert_word_batch_to_pdf else [outcome]
+                    except CancelledError:
+                        # Another session retired the pool; resubmit on the next pass
+                        continue
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        error_msg = f"Conversion failed: {str(e)}"
+                        logger.error(error_msg)
+                        results = [(False, error_msg)] * len(indices)
+                    
+                    del tasks[key]
+                    for index, (success, error_message) in zip(indices, results):
+                        yield index, success, error_message
+                
+                # The pool marks one extra queued call as running, so only the
+                # first CONVERSION_WORKERS running jobs have a worker yet
+                now = time.time()
+                running = [future for future in futures if future in not_done and future.running()]
+                for future in running[:CONVERSION_WORKERS]:
+                    started.setdefault(future, now)
+                timed_out = []
+                for future in running:
+                    if future in started and now - started[future] > CONVERSION_TIMEOUT * len(tasks[futures[future]][2]):
+                        timed_out.append(future)
+                
+                if timed_out:
+                    # The stuck worker would keep its slot, so retire the pool and resubmit the rest
+                    recycle_conversion_pool(pool)
+                    for future in timed_out:
+                        indices = tasks.pop(futures[future])[2]
+                        error_msg = f"Conversion timed out after {CONVERSION_TIMEOUT * len(indices)} seconds"
+                        logger.error(error_msg)
+                        for index in indices:
+                            yield index, False, error_msg
+                    break
+        except RuntimeError as e:
+            # BrokenProcessPool, or a pool another session has already retired
+            recycle_conversion_pool(pool)
+            error_msg = f"Conversion worker stopped unexpectedly: {str(e)}"
+            logger.error(error_msg)
+            for index in sorted(index for _, _, indices in tasks.values() for index in indices):
+                yield index, False, error_msg
+            return
 
-def convert_document_to_pdf(input_path: str, output_path: str, file_type: str) -> Tuple[bool, str]:
+@st.cache_resource
+def get_libreoffice_daemon() -> dict:
     """
-    Convert any supported document type to PDF
-    
-    Args:
-        input_path (str): Path to the input file
-        output_path (str): Path for the output .pdf file
-        file_type (str): Type of file (docx, pptx, txt, md)
+    Start the shared LibreOffice daemon once per server
     
     Returns:
-        Tuple[bool, str]: (success, error_message)
+        dict: The daemon 'process' (None if LibreOffice is unavailable), the
+        'lock' guarding restarts, and the 'next_check' time and 'interval'
+        of the health check
     """
-    conversion_functions = {
-        'docx': convert_word_to_pdf,
-        'pptx': convert_powerpoint_to_pdf,
-        'txt': convert_text_to_pdf,
-        'md': convert_markdown_to_pdf
+    return {
+        'process': converters.start_libreoffice_daemon(),
+        'lock': threading.Lock(),
+        'next_check': time.time() + LIBREOFFICE_CHECK_INTERVAL,
+        'interval': LIBREOFFICE_CHECK_INTERVAL
     }
+
+def ensure_libreoffice_daemon():
+    """
+    Start the LibreOffice daemon and restart it if it stops accepting connections
     
-    if file_type not in conversion_functions:
-        return False, f"Unsupported file type: {file_type}"
+    The daemon counts as alive when a connection succeeds. The check runs
+    at most once per interval, and the interval doubles after each restart,
+    so a daemon that keeps failing is not respawned on every rerun.
+    """
+    daemon = get_libreoffice_daemon()
+    if daemon['process'] is None or time.time() < daemon['next_check']:
+        return
+    if not daemon['lock'].acquire(blocking=False):
+        # Another session is already checking
+        return
     
-    return conversion_functions[file_type](input_path, output_path)
+    try:
+        try:
+            converters.connect_libreoffice(attempts=1)
+            daemon['interval'] = LIBREOFFICE_CHECK_INTERVAL
+        except converters.LibreOfficeUnavailable as e:
+            logger.warning(f"LibreOffice daemon is not responding ({str(e)}); restarting")
+            converters.stop_libreoffice_daemon(daemon['process'])
+            daemon['process'] = converters.start_libreoffice_daemon()
+            daemon['interval'] = min(daemon['interval'] * 2, LIBREOFFICE_MAX_CHECK_INTERVAL)
+        daemon['next_check'] = time.time() + daemon['interval']
+    finally:
+        daemon['lock'].release()
 
-def get_download_link(file_path: str, file_name: str) -> str:
+def sanitize_filename(file_name: str) -> str:
     """
-    Generate a secure download link for the converted PDF
+    Strip unsafe characters from a download filename
     
     Args:
-        file_path (str): Path to the PDF file
-        file_name (str): Name for the download
+        file_name (str): Requested download name
     
     Returns:
-        str: HTML download link
+        str: Sanitized filename
     """
-    try:
-        with open(file_path, "rb") as f:
-            bytes_data = f.read()
-        
-        b64 = base64.b64encode(bytes_data).decode()
-        # Sanitize filename for download
-        safe_filename = "".join(c for c in file_name if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-        href = f'<a href="data:application/pdf;base64,{b64}" download="{safe_filename}" style="text-decoration: none; background-color: #4CAF50; color: white; padding: 10px 20px; border-radius: 5px; display: inline-block; margin: 10px 0;">📥 Download PDF</a>'
-        return href
-    except Exception as e:
-        logger.error(f"Error creating download link: {str(e)}")
-        return f"<p style='color: red;'>Error creating download link: {str(e)}</p>"
+    return UNSAFE_FILENAME_CHARS.sub('', file_name).rstrip()
 
-def cleanup_temp_files(*file_paths):
+def cleanup_expired_files():
     """
-    Clean up temporary files with error handling
+    Delete cached PDFs and leftover temp inputs older than TEMP_FILE_CLEANUP_DELAY
     
-    Args:
-        *file_paths: Variable number of file paths to clean up
+    Partial PDFs of running conversions are kept for PARTIAL_FILE_CLEANUP_DELAY
+    instead, so a long batch never has its output deleted mid-write.
     """
-    for file_path in file_paths:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.unlink(file_path)
-                logger.info(f"Cleaned up temporary file: {file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up {file_path}: {str(e)}")
+    now = time.time()
+    cutoff = now - TEMP_FILE_CLEANUP_DELAY
+    partial_cutoff = now - PARTIAL_FILE_CLEANUP_DELAY
+    expired = []
+    
+    for directory, prefix in ((str(CACHE_DIR), ""), (tempfile.gettempdir(), converters.TEMP_INPUT_PREFIX)):
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        entry_cutoff = partial_cutoff if entry.name.endswith(PARTIAL_FILE_SUFFIX) else cutoff
+                        if (entry.name.startswith(prefix)
+                                and entry.is_file(follow_symlinks=False)
+                                and entry.stat(follow_symlinks=False).st_mtime < entry_cutoff):
+                            expired.append(entry.path)
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            continue
+    
+    converters.cleanup_temp_files(*expired)
+
+def run_cleanup_loop():
+    """
+    Periodically remove expired temporary files until the server exits
+    """
+    while True:
+        try:
+            cleanup_expired_files()
+        except Exception as e:
+            logger.warning(f"Temporary file cleanup failed: {str(e)}")
+        time.sleep(TEMP_FILE_SCAN_INTERVAL)
+
+@st.cache_resource
+def start_cleanup_thread() -> threading.Thread:
+    """
+    Start the background cleanup thread once per server
+    
+    Returns:
+        threading.Thread: The running cleanup thread
+    """
+    thread = threading.Thread(target=run_cleanup_loop, name="temp-file-cleanup", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data
+def get_file_type_cards_html() -> List[str]:
+    """
+    Build the supported file type cards once per server
+    
+    Returns:
+        List[str]: One HTML card per supported file type
+    """
+    return [
+        f"""
+        <div style="text-align: center; padding: 10px; border: 1px solid #ddd; border-radius: 5px; margin: 5px;">
+            <div style="font-size: 2em;">{config['icon']}</div>
+            <div style="font-weight: bold;">{config['name']}</div>
+            <div style="font-size: 0.8em; color: #666;">.{ext}</div>
+        </div>
+        """
+        for ext, config in FILE_TYPE_CONFIG.items()
+    ]
+
+@st.cache_data
+def get_file_type_requirements_md() -> str:
+    """
+    Build the requirements-by-file-type list once per server
+    
+    Returns:
+        str: Markdown bullet list of requirements
+    """
+    return "\n".join(
+        f"- **{config['name']}** (.{ext}): {config['requires']}"
+        for ext, config in FILE_TYPE_CONFIG.items()
+    )
 
 def format_file_size(size_bytes: int) -> str:
     """
@@ -445,6 +457,134 @@ def format_file_size(size_bytes: int) -> str:
         size_bytes /= 1024.0
     return f"{size_bytes:.1f} TB"
 
+def record_conversion_result(uploaded_file, file_extension: str, success: bool, error_message: str,
+                             pdf_path: str, conversion_time: float, from_cache: bool) -> dict:
+    """
+    Store the outcome of a single document conversion in the session state
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        file_extension (str): Type of the uploaded file
+        success (bool): Whether the conversion succeeded
+        error_message (str): Error message for a failed conversion
+        pdf_path (str): Path to the converted PDF
+        conversion_time (float): Seconds taken to produce the PDF
+        from_cache (bool): Whether the PDF was served from the cache
+    
+    Returns:
+        dict: The stored result
+    """
+    result = {
+        'filename': uploaded_file.name,
+        'file_type': file_extension,
+        'size': uploaded_file.size,
+        'success': success,
+        'error_message': error_message,
+        'pdf_path': pdf_path,
+        'conversion_time': conversion_time,
+        'from_cache': from_cache
+    }
+    st.session_state.conversion_results.append(result)
+    
+    if success:
+        try:
+            pdf_size = os.path.getsize(pdf_path)
+        except FileNotFoundError:
+            # Already expired; show_conversion_result reports it
+            return result
+        
+        st.session_state.conversion_history.append({
+            'filename': uploaded_file.name,
+            'file_type': file_extension,
+            'size': uploaded_file.size,
+            'pdf_size': pdf_size,
+            'conversion_time': conversion_time,
+            'timestamp': time.time()
+        })
+        st.session_state.last_converted_file = pdf_path
+    
+    return result
+
+def show_conversion_result(result: dict, widget_key: str):
+    """
+    Display the outcome of a single document conversion
+    
+    Args:
+        result (dict): Conversion result stored by record_conversion_result
+        widget_key (str): Unique key for the download button
+    """
+    filename = result['filename']
+    file_extension = result['file_type']
+    conversion_time = result['conversion_time']
+    
+    if result['success']:
+        try:
+            pdf_file = open(result['pdf_path'], "rb")
+        except FileNotFoundError:
+            st.warning(f"⚠️ {filename}: the converted PDF has expired. Click \"Convert to PDF\" to convert it again.")
+            return
+        
+        with pdf_file:
+            pdf_size = os.fstat(pdf_file.fileno()).st_size
+            
+            if result['from_cache']:
+                st.success(f"✅ {filename} served from cache in {conversion_time:.2f} seconds!")
+            else:
+                st.success(f"✅ {filename} converted successfully in {conversion_time:.2f} seconds!")
+            
+            # Provide download button
+            download_filename = sanitize_filename(f"{Path(filename).stem}.pdf")
+            st.download_button(
+                label="📥 Download PDF",
+                data=pdf_file,
+                file_name=download_filename,
+                mime="application/pdf",
+                key=widget_key
+            )
+        
+        # Display conversion details
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("PDF Size", format_file_size(pdf_size))
+        with col2:
+            st.metric("Conversion Time", f"{conversion_time:.2f}s")
+        with col3:
+            compression_ratio = (1 - pdf_size / result['size']) * 100 if result['size'] > 0 else 0
+            st.metric("Size Change", f"{compression_ratio:+.1f}%")
+        
+    else:
+        st.error(f"❌ {filename}: {result['error_message']}")
+        
+        # File type specific troubleshooting
+        if file_extension == 'docx':
+            st.info("💡 **Word Document Troubleshooting:**")
+            st.markdown("""
+            - Ensure LibreOffice or Microsoft Word is installed (Word must be properly licensed)
+            - Check that the DOCX file is not corrupted
+            - Try opening the file in Word first to verify it works
+            """)
+        elif file_extension == 'pptx':
+            st.info("💡 **PowerPoint Troubleshooting:**")
+            st.markdown("""
+            - Ensure the PPTX file is not corrupted
+            - Check that the presentation contains readable text
+            - Try opening the file in PowerPoint first to verify it works
+            """)
+        elif file_extension == 'txt':
+            st.info("💡 **Text File Troubleshooting:**")
+            st.markdown("""
+            - Ensure the text file uses UTF-8 encoding
+            - Check that the file contains readable text
+            - Try opening the file in a text editor to verify content
+            """)
+        elif file_extension == 'md':
+            st.info("💡 **Markdown Troubleshooting:**")
+            st.markdown("""
+            - Ensure the Markdown file uses UTF-8 encoding
+            - Check that the file contains valid Markdown syntax
+            - Try previewing the file in a Markdown editor
+            """)
+
 def main():
     st.set_page_config(
         page_title="Universal Document to PDF Converter",
@@ -453,11 +593,22 @@ def main():
         initial_sidebar_state="collapsed"
     )
     
+    # Keep one LibreOffice process running for Word conversions
+    ensure_libreoffice_daemon()
+    
+    # Remove expired PDFs and temp files in the background
+    start_cleanup_thread()
+    
     # Initialize session state
     if 'conversion_history' not in st.session_state:
-        st.session_state.conversion_history = []
+        st.session_state.conversion_history = deque(maxlen=CONVERSION_HISTORY_SIZE)
     if 'last_converted_file' not in st.session_state:
         st.session_state.last_converted_file = None
+    if 'conversion_results' not in st.session_state:
+        # Kept across reruns so a download click doesn't clear the rest of the batch
+        st.session_state.conversion_results = []
+    if 'converted_uploads' not in st.session_state:
+        st.session_state.converted_uploads = ()
     
     # Header
     st.title("📄 Universal Document to PDF Converter")
@@ -465,43 +616,42 @@ def main():
     
     # Supported file types display
     st.markdown("### 🎯 Supported File Types")
-    cols = st.columns(4)
-    for i, (ext, config) in enumerate(FILE_TYPE_CONFIG.items()):
-        with cols[i]:
-            st.markdown(f"""
-            <div style="text-align: center; padding: 10px; border: 1px solid #ddd; border-radius: 5px; margin: 5px;">
-                <div style="font-size: 2em;">{config['icon']}</div>
-                <div style="font-weight: bold;">{config['name']}</div>
-                <div style="font-size: 0.8em; color: #666;">.{ext}</div>
-            </div>
-            """, unsafe_allow_html=True)
+    cards_html = get_file_type_cards_html()
+    cols = st.columns(len(cards_html))
+    for col, card_html in zip(cols, cards_html):
+        with col:
+            st.markdown(card_html, unsafe_allow_html=True)
     
     # System requirements
     with st.expander("⚠️ System Requirements", expanded=False):
         st.markdown("### Requirements by File Type:")
-        for ext, config in FILE_TYPE_CONFIG.items():
-            st.markdown(f"- **{config['name']}** (.{ext}): {config['requires']}")
+        st.markdown(get_file_type_requirements_md())
         
         st.warning("""
-        **Note for Word documents:** Requires Microsoft Word to be installed on the system.
+        **Note for Word documents:** Requires LibreOffice (with its Python UNO bindings) or Microsoft Word to be installed on the system.
         Other file types use Python libraries and don't require additional software.
         """)
     
     # File uploader with improved validation
-    uploaded_file = st.file_uploader(
-        "Choose a document to convert",
+    uploaded_files = st.file_uploader(
+        "Choose documents to convert",
         type=ALLOWED_EXTENSIONS,
-        help=f"Select a document file to convert to PDF (Max size: {MAX_FILE_SIZE // (1024*1024)}MB)",
+        help=f"Select one or more document files to convert to PDF (Max size: {MAX_FILE_SIZE // (1024*1024)}MB each)",
+        accept_multiple_files=True,
         key="file_uploader"
     )
     
-    if uploaded_file is not None:
+    documents = []
+    for uploaded_file in uploaded_files or []:
+        # Read the upload once and reuse the bytes for validation, hashing and conversion
+        file_content = uploaded_file.getvalue()
+        
         # Validate file
-        is_valid, error_message = validate_file(uploaded_file)
+        is_valid, error_message = validate_file(file_content, uploaded_file.name, uploaded_file.size)
         
         if not is_valid:
-            st.error(f"❌ {error_message}")
-            return
+            st.error(f"❌ {uploaded_file.name}: {error_message}")
+            continue
         
         # Get file type
         file_extension = Path(uploaded_file.name).suffix.lower().lstrip('.')
@@ -516,102 +666,94 @@ def main():
         with col3:
             st.info(f"🔧 **Type:** {file_config['name']}")
         
-        # Convert button
-        if st.button("🔄 Convert to PDF", type="primary", use_container_width=True):
-            start_time = time.time()
+        documents.append((uploaded_file, file_content, file_extension))
+    
+    # Results belong to the uploads they were produced from
+    uploads = tuple((uploaded_file.name, uploaded_file.size) for uploaded_file, _, _ in documents)
+    if uploads != st.session_state.converted_uploads:
+        st.session_state.conversion_results = []
+    
+    # Convert button
+    if documents and st.button("🔄 Convert to PDF", type="primary", use_container_width=True):
+        start_time = time.time()
+        st.session_state.conversion_results = []
+        st.session_state.converted_uploads = uploads
+        
+        with st.spinner(f"Converting {len(documents)} document(s) to PDF... Please wait."):
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
             
-            with st.spinner(f"Converting {file_config['name']} to PDF... Please wait."):
-                # Create temporary files with unique names
-                file_hash = hashlib.md5(uploaded_file.getvalue()).hexdigest()[:8]
+            # Serve cached PDFs right away and queue one job per distinct upload
+            jobs = []
+            job_cache_files = []
+            job_documents = []
+            job_by_key = {}
+            for doc_index, (uploaded_file, file_content, file_extension) in enumerate(documents):
+                # The same bytes render differently per type (e.g. .md vs .txt)
+                cache_key = f"{compute_file_hash(file_content)}.{file_extension}"
+                cache_file = CACHE_DIR / f"{cache_key}.pdf"
                 
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}", prefix=f"{file_extension}_{file_hash}_") as tmp_input:
-                    tmp_input.write(uploaded_file.getvalue())
-                    tmp_input_path = tmp_input.name
+                try:
+                    # Refresh the mtime so the cleanup thread keeps a PDF that is being served;
+                    # an entry that has already been removed is simply converted again
+                    os.utime(cache_file)
+                    cached = True
+                except FileNotFoundError:
+                    cached = False
                 
-                # Generate output filename
-                input_name = Path(uploaded_file.name).stem
-                tmp_output_path = os.path.join(tempfile.gettempdir(), f"pdf_{file_hash}_{input_name}.pdf")
+                if cached:
+                    result = record_conversion_result(
+                        uploaded_file, file_extension, True, "", str(cache_file),
+                        time.time() - start_time, True
+                    )
+                    show_conversion_result(result, f"download_{len(st.session_state.conversion_results) - 1}")
+                    continue
                 
-                # Perform conversion
-                success, error_message = convert_document_to_pdf(tmp_input_path, tmp_output_path, file_extension)
+                if cache_key not in job_by_key:
+                    # Convert into a per-job partial file so a failed run never leaves a bad
+                    # cache entry and concurrent sessions never write the same file
+                    partial_fd, partial_output_path = tempfile.mkstemp(
+                        dir=CACHE_DIR, prefix=f"{cache_key}.", suffix=PARTIAL_FILE_SUFFIX
+                    )
+                    os.close(partial_fd)
+                    job_by_key[cache_key] = len(jobs)
+                    jobs.append((file_content, partial_output_path, file_extension))
+                    job_cache_files.append(str(cache_file))
+                    job_documents.append([])
+                job_documents[job_by_key[cache_key]].append(doc_index)
+            
+            for job_index, success, error_message in iter_conversions(jobs):
+                partial_output_path = jobs[job_index][1]
+                # Failed partial files are left for the cleanup thread
+                if success:
+                    try:
+                        os.replace(partial_output_path, job_cache_files[job_index])
+                    except FileNotFoundError:
+                        # Our partial file is gone; fine as long as another job already cached the PDF
+                        success = os.path.isfile(job_cache_files[job_index])
+                        error_message = "" if success else "Converted PDF was removed before it could be saved"
                 
                 conversion_time = time.time() - start_time
-                
-                if success:
-                    st.success(f"✅ {file_config['name']} converted successfully in {conversion_time:.2f} seconds!")
-                    
-                    # Provide download link
-                    download_filename = f"{input_name}.pdf"
-                    st.markdown(
-                        get_download_link(tmp_output_path, download_filename),
-                        unsafe_allow_html=True
+                for doc_index in job_documents[job_index]:
+                    uploaded_file, _, file_extension = documents[doc_index]
+                    result = record_conversion_result(
+                        uploaded_file, file_extension, success, error_message, job_cache_files[job_index],
+                        conversion_time, False
                     )
-                    
-                    # Display conversion details
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        pdf_size = os.path.getsize(tmp_output_path)
-                        st.metric("PDF Size", format_file_size(pdf_size))
-                    with col2:
-                        st.metric("Conversion Time", f"{conversion_time:.2f}s")
-                    with col3:
-                        compression_ratio = (1 - pdf_size / uploaded_file.size) * 100 if uploaded_file.size > 0 else 0
-                        st.metric("Size Change", f"{compression_ratio:+.1f}%")
-                    
-                    # Update session state
-                    st.session_state.conversion_history.append({
-                        'filename': uploaded_file.name,
-                        'file_type': file_extension,
-                        'size': uploaded_file.size,
-                        'pdf_size': pdf_size,
-                        'conversion_time': conversion_time,
-                        'timestamp': time.time()
-                    })
-                    st.session_state.last_converted_file = tmp_output_path
-                    
-                    # Schedule cleanup (in a real app, you'd want a background task)
-                    st.info("💡 **Tip:** The PDF file will be automatically cleaned up after 5 minutes for security.")
-                    
-                else:
-                    st.error(f"❌ {error_message}")
-                    
-                    # File type specific troubleshooting
-                    if file_extension == 'docx':
-                        st.info("💡 **Word Document Troubleshooting:**")
-                        st.markdown("""
-                        - Ensure Microsoft Word is installed and properly licensed
-                        - Check that the DOCX file is not corrupted
-                        - Try opening the file in Word first to verify it works
-                        """)
-                    elif file_extension == 'pptx':
-                        st.info("💡 **PowerPoint Troubleshooting:**")
-                        st.markdown("""
-                        - Ensure the PPTX file is not corrupted
-                        - Check that the presentation contains readable text
-                        - Try opening the file in PowerPoint first to verify it works
-                        """)
-                    elif file_extension == 'txt':
-                        st.info("💡 **Text File Troubleshooting:**")
-                        st.markdown("""
-                        - Ensure the text file uses UTF-8 encoding
-                        - Check that the file contains readable text
-                        - Try opening the file in a text editor to verify content
-                        """)
-                    elif file_extension == 'md':
-                        st.info("💡 **Markdown Troubleshooting:**")
-                        st.markdown("""
-                        - Ensure the Markdown file uses UTF-8 encoding
-                        - Check that the file contains valid Markdown syntax
-                        - Try previewing the file in a Markdown editor
-                        """)
-                
-                # Clean up input file immediately
-                cleanup_temp_files(tmp_input_path)
+                    show_conversion_result(result, f"download_{len(st.session_state.conversion_results) - 1}")
+    
+    elif st.session_state.conversion_results:
+        # Re-render the last batch, e.g. after a download button click
+        for result_index, result in enumerate(st.session_state.conversion_results):
+            show_conversion_result(result, f"download_{result_index}")
+    
+    if st.session_state.conversion_results:
+        # Expired PDFs are removed by the background cleanup thread
+        st.info("💡 **Tip:** PDF files will be automatically cleaned up after 5 minutes for security.")
     
     # Conversion history
     if st.session_state.conversion_history:
         with st.expander("📊 Conversion History", expanded=False):
-            for i, conversion in enumerate(reversed(st.session_state.conversion_history[-10:])):  # Show last 10
+            for conversion in reversed(st.session_state.conversion_history):
                 file_config = FILE_TYPE_CONFIG[conversion['file_type']]
                 st.write(f"{file_config['icon']} **{conversion['filename']}** ({conversion['file_type'].upper()}) - {format_file_size(conversion['size'])} → {format_file_size(conversion['pdf_size'])} ({conversion['conversion_time']:.2f}s)")
     
@@ -619,7 +761,7 @@ def main():
     with st.expander("ℹ️ How to Use", expanded=False):
         st.markdown("""
         ### **Step-by-Step Guide:**
-        1. **Upload**: Click "Browse files" and select your document
+        1. **Upload**: Click "Browse files" and select one or more documents
         2. **Validate**: The app will check your file for compatibility
         3. **Convert**: Click "Convert to PDF" to start the conversion process
         4. **Download**: Click the download button to save your PDF file
@@ -628,14 +770,14 @@ def main():
         - ✅ **Word Documents** (.docx): Full formatting preservation
         - ✅ **PowerPoint** (.pptx): Slide content extraction
         - ✅ **Text Files** (.txt): Clean formatting with monospace font
-        - ✅ **Markdown** (.md): Rich formatting with syntax highlighting
+        - ✅ **Markdown** (.md): Rich formatting with tables and code blocks
         - ✅ **File size validation** (up to 50MB)
         - ✅ **Conversion time tracking**
         - ✅ **File size comparison**
         - ✅ **Automatic cleanup** for security
         
         ### **File Type Specific Notes:**
-        - **Word**: Requires Microsoft Word installation
+        - **Word**: Requires LibreOffice or Microsoft Word installation
         - **PowerPoint**: Extracts text content from slides
         - **Text**: Preserves formatting and line breaks
         - **Markdown**: Converts to styled HTML then PDF
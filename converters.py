@@ -0,0 +1,573 @@
+import os
+import atexit
+import tempfile
+import shutil
+import subprocess
+import logging
+import html
+import re
+import time
+from typing import BinaryIO, List, Optional, Tuple
+from io import BytesIO
+from docx2pdf import convert
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # UNO bindings ship with LibreOffice, not on PyPI
+    uno = None
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from markdown_it import MarkdownIt
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+from pptx import Presentation
+
+logger = logging.getLogger(__name__)
+
+# Constants
+TEMP_INPUT_PREFIX = "pdf_converter_"
+PARAGRAPH_BREAK = re.compile(r'\n\n+')
+LIBREOFFICE_CONNECTION = "socket,host=localhost,port=2202;urp;"
+LIBREOFFICE_CONNECT_ATTEMPTS = 5
+LIBREOFFICE_CONNECT_DELAY = 0.5  # seconds, doubled after each failed attempt
+LIBREOFFICE_STOP_TIMEOUT = 10  # seconds
+# A profile of our own, so the daemon never hands off to the user's desktop LibreOffice
+LIBREOFFICE_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "pdf_converter_libreoffice")
+DRAWINGML_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+DRAWINGML_PARAGRAPH_TAG = f"{{{DRAWINGML_NS}}}p"
+DRAWINGML_TEXT_TAG = f"{{{DRAWINGML_NS}}}t"
+DRAWINGML_RUN_TAGS = (f"{{{DRAWINGML_NS}}}r", f"{{{DRAWINGML_NS}}}fld")
+DRAWINGML_BREAK_TAG = f"{{{DRAWINGML_NS}}}br"
+
+# Markdown rendering, built once per process and reused for every conversion
+MARKDOWN_PARSER = MarkdownIt("commonmark").enable(["table", "strikethrough"])
+MARKDOWN_FONT_CONFIG = FontConfiguration()
+MARKDOWN_CSS = CSS(font_config=MARKDOWN_FONT_CONFIG, string="""
+    body {
+        font-family: Arial, sans-serif;
+        line-height: 1.6;
+        margin: 40px;
+        color: #333;
+    }
+    h1, h2, h3, h4, h5, h6 {
+        color: #2c3e50;
+        margin-top: 30px;
+        margin-bottom: 15px;
+    }
+    h1 { font-size: 2.2em; }
+    h2 { font-size: 1.8em; }
+    h3 { font-size: 1.4em; }
+    p { margin-bottom: 15px; }
+    code {
+        background-color: #f4f4f4;
+        padding: 2px 4px;
+        border-radius: 3px;
+        font-family: 'Courier New', monospace;
+    }
+    pre {
+        background-color: #f8f8f8;
+        padding: 15px;
+        border-radius: 5px;
+        overflow-x: auto;
+        border-left: 4px solid #3498db;
+    }
+    blockquote {
+        border-left: 4px solid #bdc3c7;
+        margin-left: 0;
+        padding-left: 20px;
+        color: #7f8c8d;
+    }
+    table {
+        border-collapse: collapse;
+        width: 100%;
+        margin: 20px 0;
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 8px;
+        text-align: left;
+    }
+    th {
+        background-color: #f2f2f2;
+        font-weight: bold;
+    }
+""")
+
+# PDF paragraph styles, built once and reused for every conversion
+STYLES = getSampleStyleSheet()
+PPTX_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=30,
+    textColor='darkblue'
+)
+PPTX_CONTENT_STYLE = ParagraphStyle(
+    'CustomContent',
+    parent=STYLES['Normal'],
+    fontSize=12,
+    spaceAfter=12
+)
+TEXT_STYLE = ParagraphStyle(
+    'CustomText',
+    parent=STYLES['Normal'],
+    fontSize=11,
+    fontName='Courier',
+    spaceAfter=6,
+    leftIndent=0
+)
+
+def start_libreoffice_daemon() -> Optional[subprocess.Popen]:
+    """
+    Start one headless LibreOffice process shared by all conversions
+    
+    Returns:
+        Optional[subprocess.Popen]: The daemon process, or None if LibreOffice
+        or its UNO bindings are not installed
+    """
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if uno is None or soffice is None:
+        logger.info("LibreOffice not available; Word documents will use docx2pdf")
+        return None
+    
+    logger.info("Starting LibreOffice daemon")
+    process = subprocess.Popen(
+        [
+            soffice, "--headless", "--invisible", "--nologo", "--norestore",
+            f"-env:UserInstallation={uno.systemPathToFileUrl(LIBREOFFICE_PROFILE_DIR)}",
+            f"--accept={LIBREOFFICE_CONNECTION}"
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # Don't let the daemon outlive the server
+    atexit.register(stop_libreoffice_daemon, process)
+    return process
+
+def stop_libreoffice_daemon(process: subprocess.Popen):
+    """
+    Terminate a LibreOffice daemon, killing it if it doesn't exit in time
+    
+    Args:
+        process (subprocess.Popen): Daemon process to stop
+    """
+    if process.poll() is not None:
+        return
+    
+    process.terminate()
+    try:
+        process.wait(timeout=LIBREOFFICE_STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+class LibreOfficeUnavailable(Exception):
+    """
+    Raised when the LibreOffice daemon cannot be reached
+    """
+
+def connect_libreoffice(attempts: int = LIBREOFFICE_CONNECT_ATTEMPTS):
+    """
+    Connect to the running LibreOffice daemon
+    
+    The daemon needs a few seconds after starting before it accepts
+    connections, so failed attempts are retried with a short backoff.
+    
+    Args:
+        attempts (int): Number of connection attempts before giving up
+    
+    Returns:
+        The daemon's UNO component context
+    
+    Raises:
+        LibreOfficeUnavailable: If the UNO bindings are missing or the daemon is unreachable
+    """
+    if uno is None:
+        raise LibreOfficeUnavailable("LibreOffice UNO bindings are not installed")
+    
+    local_context = uno.getComponentContext()
+    resolver = local_context.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_context
+    )
+    delay = LIBREOFFICE_CONNECT_DELAY
+    for attempt in range(1, attempts + 1):
+        try:
+            return resolver.resolve(f"uno:{LIBREOFFICE_CONNECTION}StarOffice.ComponentContext")
+        except Exception as e:
+            if attempt == attempts:
+                raise LibreOfficeUnavailable(f"LibreOffice daemon is unreachable: {str(e)}") from e
+            time.sleep(delay)
+            delay *= 2
+
+def libreoffice_property(name: str, value):
+    """
+    Build a UNO PropertyValue for LibreOffice API calls
+    """
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+def convert_with_libreoffice(input_path: str, output_path: str, context=None):
+    """
+    Convert a Word document to PDF through the running LibreOffice daemon
+    
+    Args:
+        input_path (str): Path to the input .docx file
+        output_path (str): Path for the output .pdf file
+        context: UNO component context from connect_libreoffice; a new
+            connection is made when omitted
+    
+    Raises:
+        LibreOfficeUnavailable: If the daemon is unreachable
+        Exception: If LibreOffice fails to convert the document
+    """
+    if context is None:
+        context = connect_libreoffice()
+    desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+    
+    document = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(os.path.abspath(input_path)),
+        "_blank",
+        0,
+        (libreoffice_property("Hidden", True),)
+    )
+    if document is None:
+        raise RuntimeError("LibreOffice could not open the document")
+    
+    try:
+        document.storeToURL(
+            uno.systemPathToFileUrl(os.path.abspath(output_path)),
+            (libreoffice_property("FilterName", "writer_pdf_Export"),)
+        )
+    finally:
+        document.close(True)
+
+def convert_word_to_pdf(input_path: str, output_path: str, libreoffice_context=None) -> Tuple[bool, str]:
+    """
+    Convert a Word document to PDF with better error handling
+    
+    Args:
+        input_path (str): Path to the input .docx file
+        output_path (str): Path for the output .pdf file
+        libreoffice_context: UNO component context to reuse, if already connected
+    
+    Returns:
+        Tuple[bool, str]: (success, error_message)
+    """
+    try:
+        # Validate input file exists
+        if not os.path.exists(input_path):
+            return False, "Input file not found"
+        
+        # Perform conversion, falling back to docx2pdf only when LibreOffice is unreachable
+        try:
+            convert_with_libreoffice(input_path, output_path, libreoffice_context)
+        except LibreOfficeUnavailable as e:
+            logger.info(f"LibreOffice conversion unavailable ({str(e)}); using docx2pdf")
+            convert(input_path, output_path)
+        
+        # Verify output file was created and has content
+        try:
+            if os.stat(output_path).st_size == 0:
+                return False, "Generated PDF file is empty"
+        except FileNotFoundError:
+            return False, "PDF file was not created"
+        
+        logger.info(f"Successfully converted {input_path} to {output_path}")
+        return True, ""
+        
+    except Exception as e:
+        error_msg = f"Word conversion failed: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+def convert_word_batch_to_pdf(jobs: List[Tuple[bytes, str]]) -> List[Tuple[bool, str]]:
+    """
+    Convert several Word documents to PDF in one LibreOffice or Word session
+    
+    When the LibreOffice daemon is reachable, one connection is made and each
+    document is converted over it on its own, so one bad file fails only
+    itself; otherwise a single docx2pdf directory conversion starts Word once
+    for the batch.
+    
+    Args:
+        jobs: (input_data, output_path) for each .docx file
+    
+    Returns:
+        List[Tuple[bool, str]]: (success, error_message) for each job, in order
+    """
+    try:
+        context = connect_libreoffice()
+    except LibreOfficeUnavailable as e:
+        logger.info(f"LibreOffice conversion unavailable ({str(e)}); using docx2pdf")
+    else:
+        results = []
+        for input_data, output_path in jobs:
+            input_path = write_temp_input(input_data, 'docx')
+            try:
+                results.append(convert_word_to_pdf(input_path, output_path, context))
+            finally:
+                cleanup_temp_files(input_path)
+        return results
+    
+    with tempfile.TemporaryDirectory(prefix="docx_batch_") as work_dir:
+        input_dir = os.path.join(work_dir, "input")
+        output_dir = os.path.join(work_dir, "output")
+        os.makedirs(input_dir)
+        os.makedirs(output_dir)
+        
+        for i, (input_data, _) in enumerate(jobs):
+            with open(os.path.join(input_dir, f"{i}.docx"), "wb") as input_file:
+                input_file.write(input_data)
+        
+        try:
+            convert(input_dir, output_dir)
+        except Exception as e:
+            error_msg = f"Word conversion failed: {str(e)}"
+            logger.error(error_msg)
+            return [(False, error_msg)] * len(jobs)
+        
+        results = []
+        for i, (_, output_path) in enumerate(jobs):
+            pdf_path = os.path.join(output_dir, f"{i}.pdf")
+            try:
+                pdf_size = os.stat(pdf_path).st_size
+            except FileNotFoundError:
+                results.append((False, "PDF file was not created"))
+                continue
+            
+            if pdf_size == 0:
+                results.append((False, "Generated PDF file is empty"))
+            else:
+                shutil.move(pdf_path, output_path)
+                # move keeps the original mtime; refresh it so the cleanup thread sees a new file
+                os.utime(output_path)
+                results.append((True, ""))
+        
+        logger.info(f"Converted Word batch: {sum(success for success, _ in results)}/{len(jobs)} succeeded")
+        return results
+
+def extract_shape_text(shape) -> str:
+    """
+    Extract the text of a PowerPoint shape in a single pass over its XML
+    
+    Args:
+        shape: python-pptx shape
+    
+    Returns:
+        str: Shape text with paragraphs and soft line breaks as newlines
+    """
+    paragraphs = []
+    for paragraph in shape._element.iter(DRAWINGML_PARAGRAPH_TAG):
+        # Runs, fields and line breaks in document order
+        parts = []
+        for child in paragraph:
+            if child.tag in DRAWINGML_RUN_TAGS:
+                text = child.find(DRAWINGML_TEXT_TAG)
+                if text is not None and text.text:
+                    parts.append(text.text)
+            elif child.tag == DRAWINGML_BREAK_TAG:
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+def convert_powerpoint_to_pdf(input_data: bytes, output_buf: BinaryIO) -> Tuple[bool, str]:
+    """
+    Convert a PowerPoint presentation to PDF
+    
+    Args:
+        input_data (bytes): Contents of the input .pptx file
+        output_buf (BinaryIO): Writable binary stream for the PDF output
+    
+    Returns:
+        Tuple[bool, str]: (success, error_message)
+    """
+    try:
+        # Load presentation
+        prs = Presentation(BytesIO(input_data))
+        
+        # Create PDF document
+        doc = SimpleDocTemplate(output_buf, pagesize=letter)
+        story = []
+        
+        # Process each slide
+        for i, slide in enumerate(prs.slides):
+            # Add slide number
+            story.append(Paragraph(f"Slide {i + 1}", PPTX_TITLE_STYLE))
+            story.append(Spacer(1, 12))
+            
+            # Collect the text of all shapes into a single paragraph per slide,
+            # escaped so '<' and '&' in slides don't break the reportlab markup
+            shape_texts = (extract_shape_text(shape) for shape in slide.shapes)
+            slide_text = "<br/><br/>".join(
+                html.escape(text, quote=False).replace('\n', '<br/>') for text in shape_texts if text
+            )
+            story.append(Paragraph(slide_text or "(No text content)", PPTX_CONTENT_STYLE))
+            
+            # Add space between slides
+            story.append(Spacer(1, 20))
+        
+        # Build PDF
+        doc.build(story)
+        
+        logger.info(f"Successfully converted PowerPoint presentation ({len(input_data)} bytes)")
+        return True, ""
+        
+    except Exception as e:
+        error_msg = f"PowerPoint conversion failed: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+def convert_text_to_pdf(input_data: bytes, output_buf: BinaryIO) -> Tuple[bool, str]:
+    """
+    Convert a text file to PDF
+    
+    Args:
+        input_data (bytes): Contents of the input .txt file
+        output_buf (BinaryIO): Writable binary stream for the PDF output
+    
+    Returns:
+        Tuple[bool, str]: (success, error_message)
+    """
+    try:
+        # Decode text file
+        content = input_data.decode('utf-8')
+        
+        # Create PDF document
+        doc = SimpleDocTemplate(output_buf, pagesize=letter)
+        story = []
+        
+        # Split content into paragraphs
+        paragraphs = PARAGRAPH_BREAK.split(content)
+        
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                # Escape markup characters, then replace line breaks with HTML breaks
+                formatted_text = html.escape(paragraph, quote=False).replace('\n', '<br/>')
+                story.append(Paragraph(formatted_text, TEXT_STYLE))
+                story.append(Spacer(1, 6))
+        
+        # Build PDF
+        doc.build(story)
+        
+        logger.info(f"Successfully converted text file ({len(input_data)} bytes)")
+        return True, ""
+        
+    except Exception as e:
+        error_msg = f"Text conversion failed: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+def convert_markdown_to_pdf(input_data: bytes, output_buf: BinaryIO) -> Tuple[bool, str]:
+    """
+    Convert a Markdown file to PDF
+    
+    Args:
+        input_data (bytes): Contents of the input .md file
+        output_buf (BinaryIO): Writable binary stream for the PDF output
+    
+    Returns:
+        Tuple[bool, str]: (success, error_message)
+    """
+    try:
+        # Decode markdown file
+        md_content = input_data.decode('utf-8')
+        
+        # Convert markdown to HTML
+        html_content = MARKDOWN_PARSER.render(md_content)
+        
+        # Create complete HTML document
+        full_html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+        </head>
+        <body>
+            {html_content}
+        </body>
+        </html>
+        """
+        
+        # Convert HTML to PDF using WeasyPrint
+        HTML(string=full_html).write_pdf(
+            output_buf,
+            stylesheets=[MARKDOWN_CSS],
+            font_config=MARKDOWN_FONT_CONFIG
+        )
+        
+        logger.info(f"Successfully converted Markdown file ({len(input_data)} bytes)")
+        return True, ""
+        
+    except Exception as e:
+        error_msg = f"Markdown conversion failed: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+def write_temp_input(input_data: bytes, file_type: str) -> str:
+    """
+    Write uploaded bytes to a temporary file for path-based converters
+    
+    Args:
+        input_data (bytes): Contents of the input file
+        file_type (str): Type of file, used as the temp file suffix
+    
+    Returns:
+        str: Path to the temporary input file
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_type}", prefix=f"{TEMP_INPUT_PREFIX}{file_type}_") as tmp_input:
+        tmp_input.write(input_data)
+        return tmp_input.name
+
+# In-memory converters by file type; Word documents are handled separately
+CONVERSION_FUNCTIONS = {
+    'pptx': convert_powerpoint_to_pdf,
+    'txt': convert_text_to_pdf,
+    'md': convert_markdown_to_pdf
+}
+
+def convert_document_to_pdf(input_data: bytes, output_path: str, file_type: str) -> Tuple[bool, str]:
+    """
+    Convert any supported document type to PDF
+    
+    Word documents go through convert_word_batch_to_pdf as a batch of one
+    because LibreOffice and docx2pdf only work with paths; all other types
+    are converted in memory.
+    
+    Args:
+        input_data (bytes): Contents of the input file
+        output_path (str): Path for the output .pdf file
+        file_type (str): Type of file (docx, pptx, txt, md)
+    
+    Returns:
+        Tuple[bool, str]: (success, error_message)
+    """
+    if file_type == 'docx':
+        return convert_word_batch_to_pdf([(input_data, output_path)])[0]
+    
+    conversion_function = CONVERSION_FUNCTIONS.get(file_type)
+    if conversion_function is None:
+        return False, f"Unsupported file type: {file_type}"
+    
+    with open(output_path, 'wb') as output_buf:
+        return conversion_function(input_data, output_buf)
+
+def cleanup_temp_files(*file_paths):
+    """
+    Clean up temporary files with error handling
+    
+    Args:
+        *file_paths: Variable number of file paths to clean up
+    """
+    for file_path in file_paths:
+        if not file_path:
+            continue
+        try:
+            os.unlink(file_path)
+            logger.info(f"Cleaned up temporary file: {file_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to clean up {file_path}: {str(e)}")